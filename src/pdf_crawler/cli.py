@@ -17,12 +17,14 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--output", default=env_default("PDF_CRAWLER_OUTPUT", "downloads"), help="Directory for downloaded PDFs")
     parser.add_argument("--max-depth", type=int, default=int(env_default("PDF_CRAWLER_DEPTH", "1")), help="Maximum crawl depth")
     parser.add_argument("--concurrency", type=int, default=int(env_default("PDF_CRAWLER_CONCURRENCY", "3")), help="Number of concurrent page fetches")
+    parser.add_argument("--host-concurrency", type=int, default=int(env_default("PDF_CRAWLER_HOST_CONCURRENCY", "4")), help="Maximum concurrent requests per host")
     parser.add_argument("--timeout", type=int, default=int(env_default("PDF_CRAWLER_TIMEOUT", "30")), help="Request timeout in seconds")
     parser.add_argument("--retries", type=int, default=int(env_default("PDF_CRAWLER_RETRIES", "2")), help="Number of retries for failed requests")
     parser.add_argument("--config", type=Path, help="Path to JSON config file")
     parser.add_argument("--auth-config", type=Path, help="Path to JSON file describing authentication flow")
     parser.add_argument("--respect-robots", action="store_true", default=True, help="Respect robots.txt (default: true)")
     parser.add_argument("--ignore-robots", action="store_false", dest="respect_robots", help="Ignore robots.txt directives")
+    parser.add_argument("--resume", action="store_true", help="Resume the crawl frontier stored in the output directory")
     parser.add_argument("--verbose", action="store_true", help="Enable verbose logging")
     return parser.parse_args()
 
@@ -35,9 +37,11 @@ def build_config(args: argparse.Namespace) -> CrawlConfig:
         config.output_dir = Path(args.output)
         config.max_depth = args.max_depth
         config.concurrency = args.concurrency
+        config.host_concurrency = args.host_concurrency
         config.timeout = args.timeout
         config.retries = args.retries
         config.respect_robots_txt = args.respect_robots
+        config.resume = args.resume or config.resume
         return config
 
     if not args.url:
@@ -54,9 +58,11 @@ def build_config(args: argparse.Namespace) -> CrawlConfig:
         auth=auth,
         max_depth=args.max_depth,
         concurrency=args.concurrency,
+        host_concurrency=args.host_concurrency,
         timeout=args.timeout,
         retries=args.retries,
         respect_robots_txt=args.respect_robots,
+        resume=args.resume,
     )
 
 
@@ -45,9 +45,11 @@ class CrawlConfig:
     auth: Optional[AuthConfig] = None
     max_depth: int = 1
     concurrency: int = 3
+    host_concurrency: int = 4
     timeout: int = 30
     respect_robots_txt: bool = True
     retries: int = 2
+    resume: bool = False
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "CrawlConfig":
@@ -58,9 +60,11 @@ class CrawlConfig:
             auth=AuthConfig.from_dict(auth) if auth else None,
             max_depth=data.get("max_depth", 1),
             concurrency=data.get("concurrency", 3),
+            host_concurrency=data.get("host_concurrency", 4),
             timeout=data.get("timeout", 30),
             respect_robots_txt=data.get("respect_robots_txt", True),
             retries=data.get("retries", 2),
+            resume=data.get("resume", False),
         )
 
     @classmethod
@@ -2,207 +2,385 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from collections import deque
+import multiprocessing
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
-from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
-from urllib.parse import urldefrag, urljoin, urlparse
+from typing import AsyncIterator, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
+from urllib import robotparser
+from urllib.parse import urldefrag, urljoin, urlparse, urlsplit
 
-from bs4 import BeautifulSoup
+import aiohttp
+from selectolax.lexbor import LexborHTMLParser, LexborNode
 from tqdm import tqdm
 
 from .config import CrawlConfig
-from .fetchers import FetchResult, PlaywrightFetcher, StaticFetcher, playwright_fetcher
-from .models import PDFDocument
+from .fetchers import FetchResult, PlaywrightFetcher, StaticFetcher, http_session, playwright_fetcher
+from .frontier import Frontier
+from .models import ParsedPage, PDFDocument
 from .storage import PDFStorage
 from .utils import configure_logging
 
 LOGGER = logging.getLogger("pdf_crawler.crawler")
 
 
+_SCHEME = re.compile(r"[A-Za-z][A-Za-z0-9+.-]*:")
+_AUTHORITY = re.compile(r"([A-Za-z][A-Za-z0-9+.-]*)://([^/?#]+)")
+# urlsplit drops these anywhere in a URL, e.g. inside attribute values wrapped across lines.
+_URL_UNSAFE = str.maketrans("", "", "\t\r\n")
+_DOT_SEGMENT = re.compile(r"(?:^|/)\.{1,2}(?:[/?]|$)")
+
+_LINK_TAGS = frozenset({"a", "iframe", "embed"})
+_NON_VISIBLE_TAGS = frozenset({"script", "style"})
+_SPA_MARKERS = ("data-reactroot", "data-reactid", "ng-app")
+
+
 @dataclass
 class PageTask:
     url: str
     depth: int
 
 
+class _BaseUrl(NamedTuple):
+    url: str
+    scheme: str
+    netloc: str
+    path: str
+    directory: str
+
+
+def _split_base(url: str) -> _BaseUrl:
+    url = url.split("#", 1)[0]
+    parts = urlsplit(url)
+    directory = parts.path[: parts.path.rfind("/") + 1] or "/"
+    return _BaseUrl(url, parts.scheme, parts.netloc, parts.path, directory)
+
+
+def _resolve(href: str, base: _BaseUrl) -> Tuple[str, str]:
+    """Resolve ``href`` against ``base`` without a full URL parse; returns the defragmented URL and its netloc."""
+    href = href.strip().translate(_URL_UNSAFE).split("#", 1)[0]
+    if not href:
+        return base.url, base.netloc
+    if href == "?" or _DOT_SEGMENT.search(href):
+        return _join(href, base)
+    if href.startswith("//"):
+        absolute = f"{base.scheme}:{href}"
+    elif href[0] == "/":
+        return f"{base.scheme}://{base.netloc}{href}", base.netloc
+    elif href[0] == "?":
+        return f"{base.scheme}://{base.netloc}{base.path}{href}", base.netloc
+    elif _SCHEME.match(href):
+        absolute = href
+    else:
+        return f"{base.scheme}://{base.netloc}{base.directory}{href}", base.netloc
+    authority = _AUTHORITY.match(absolute)
+    if authority is None:
+        # Empty authority ("///x") or a scheme without "//" ("http:g", "mailto:"): let urljoin apply the rules.
+        return _join(href, base)
+    scheme = authority[1]
+    if not scheme.islower():
+        absolute = scheme.lower() + absolute[len(scheme) :]
+    return absolute, authority[2]
+
+
+def _join(href: str, base: _BaseUrl) -> Tuple[str, str]:
+    absolute = _normalize(urljoin(base.url, href))
+    return absolute, urlsplit(absolute).netloc
+
+
+def _is_skipped_link(href: str) -> bool:
+    return href[:11].lower().startswith(("mailto:", "javascript:"))
+
+
+def _is_pdf_link(url: str) -> bool:
+    lowered = url.lower()
+    return lowered.endswith(".pdf") or ".pdf?" in lowered
+
+
+def _parse_context() -> multiprocessing.context.BaseContext:
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _parse_page(content: str, base_url: str, allowed_domains: FrozenSet[str]) -> ParsedPage:
+    tree = LexborHTMLParser(content)
+    base = _split_base(base_url)
+    return ParsedPage(
+        links=list(_extract_links(tree, base, allowed_domains)),
+        pdfs=_extract_pdfs(tree, base),
+        requires_playwright=_requires_playwright(tree),
+    )
+
+
+def _requires_playwright(tree: LexborHTMLParser) -> bool:
+    script_count = 0
+    text_length = 0
+    spa_marker = False
+    for node in tree.root.traverse(include_text=True):
+        tag = node.tag
+        if tag == "-text":
+            if text_length < 200 and node.parent is not None and node.parent.tag not in _NON_VISIBLE_TAGS:
+                text_length += len(node.text_content.strip())
+            continue
+        attrs = node.attrs
+        if "src" in attrs or (tag in _LINK_TAGS and "href" in attrs):
+            # Anything linkable means the static HTML is already useful.
+            return False
+        if tag == "script":
+            script_count += 1
+        if not spa_marker:
+            spa_marker = any(marker in attrs for marker in _SPA_MARKERS) or attrs.get("id") == "app"
+    return (script_count > 10 and text_length < 200) or spa_marker
+
+
+def _extract_links(tree: LexborHTMLParser, base: _BaseUrl, allowed_domains: FrozenSet[str]) -> Iterable[str]:
+    seen: Set[str] = set()
+    for node in tree.css("a[href]"):
+        href = node.attributes.get("href")
+        if not href or _is_skipped_link(href):
+            continue
+        absolute, netloc = _resolve(href, base)
+        if netloc in allowed_domains and absolute not in seen:
+            seen.add(absolute)
+            yield absolute
+
+
+def _extract_pdfs(tree: LexborHTMLParser, base: _BaseUrl) -> List[Tuple[str, Optional[str]]]:
+    pdfs: Dict[str, Optional[str]] = {}
+    for node in tree.css("a[href], iframe[src], embed[src], object[data]"):
+        attrs = node.attributes
+        url_attr = attrs.get("href") or attrs.get("src") or attrs.get("data")
+        if not url_attr:
+            continue
+        absolute, _ = _resolve(url_attr, base)
+        if not _is_pdf_link(absolute) and attrs.get("type") != "application/pdf":
+            continue
+        pdfs.setdefault(absolute, _describe_context(node))
+    return list(pdfs.items())
+
+
+def _describe_context(node: LexborNode) -> Optional[str]:
+    text = node.text(separator=" ", strip=True)
+    if text:
+        return text
+    parent = node.parent
+    if parent:
+        return parent.text(separator=" ", strip=True)[:200]
+    return None
+
+
+def _normalize(url: str) -> str:
+    clean, _ = urldefrag(url)
+    return clean
+
+
 class CrawlSession:
     def __init__(
         self,
         config: CrawlConfig,
+        session: aiohttp.ClientSession,
         static_fetcher: StaticFetcher,
         playwright_fetcher: Optional[PlaywrightFetcher],
     ) -> None:
         self.config = config
         self.static_fetcher = static_fetcher
         self.playwright_fetcher = playwright_fetcher
-        self.storage = PDFStorage(config.output_dir)
-        self.visited: Set[str] = set()
+        self.storage = PDFStorage(config.output_dir, session)
+        # run() refills at half a batch, so the batch must cover at least twice the concurrency to keep every slot busy.
+        self.frontier = Frontier(
+            config.output_dir / "frontier.db", resume=config.resume, batch_size=max(256, config.concurrency * 2)
+        )
         self.downloaded: Dict[str, PDFDocument] = {}
-        self.allowed_domains = {urlparse(config.url).netloc}
-        self.robots_cache: Dict[str, Optional[object]] = {}
+        self.pending_pdfs: Set[str] = set()
+        self.allowed_domains = frozenset({urlparse(config.url).netloc})
+        self.robots_cache: Dict[str, Optional[robotparser.RobotFileParser]] = {}
+        self._robots_locks: Dict[str, asyncio.Lock] = {}
+        self.global_sem = asyncio.Semaphore(config.concurrency)
+        self.host_sems: Dict[str, asyncio.Semaphore] = {}
+        # Forking here would copy a process that already runs aiohttp's resolver, aiofiles and tqdm threads.
+        self.parse_executor = ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=_parse_context())
 
     async def run(self) -> List[PDFDocument]:
-        queue: Deque[PageTask] = deque([PageTask(self.config.url, 0)])
-        progress = tqdm(total=0, unit="page", desc="Crawling", leave=False)
+        self.frontier.push(self.config.url, 0)
+        progress = tqdm(total=0, unit="page", desc="Crawling", leave=False, mininterval=0.5, miniters=10)
         try:
-            sem = asyncio.Semaphore(self.config.concurrency)
-            tasks: Set[asyncio.Task[None]] = set()
-
-            async def schedule(task: PageTask) -> None:
-                async with sem:
-                    await self._process(task, queue)
-
-            while queue or tasks:
-                while queue and len(tasks) < self.config.concurrency:
-                    task = queue.popleft()
-                    if task.url in self.visited:
-                        continue
-                    self.visited.add(task.url)
-                    coro = schedule(task)
-                    tasks.add(asyncio.create_task(coro))
-                    progress.total += 1
-                    progress.refresh()
-                if tasks:
-                    done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
-                    for _ in done:
-                        progress.update(1)
-                else:
-                    await asyncio.sleep(0.1)
+            tasks: Dict[asyncio.Task[None], str] = {}
+            # Refill only once half the batch has drained, so each frontier read covers many pages.
+            low_water = self.frontier.batch_size // 2
+            while True:
+                if len(tasks) <= low_water:
+                    for url, depth in self.frontier.pop_batch(self.frontier.batch_size - len(tasks)):
+                        tasks[asyncio.create_task(self._process(PageTask(url, depth)))] = url
+                        progress.total += 1
+                if not tasks:
+                    break
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for finished in done:
+                    self.frontier.complete(tasks.pop(finished))
+                    progress.update(1)
         finally:
             progress.close()
+            self.parse_executor.shutdown(cancel_futures=True)
+            self.frontier.close()
         return list(self.downloaded.values())
 
-    async def _process(self, task: PageTask, queue: Deque[PageTask]) -> None:
-        if not self._is_allowed(task.url):
+    async def _process(self, task: PageTask) -> None:
+        if not await self._is_allowed(task.url):
             LOGGER.debug("Skipping disallowed url %s", task.url)
             return
-        result = await self._fetch_page(task.url)
-        if not result:
-            return
-        pdfs = self._extract_pdfs(result)
-        for pdf_url, context in pdfs:
-            if pdf_url not in self.downloaded:
-                try:
-                    document = self.storage.build_document(
-                        url=pdf_url,
-                        source_page=result.final_url,
-                        context=context,
-                    )
-                    self.downloaded[pdf_url] = document
-                    LOGGER.info("Downloaded %s -> %s", pdf_url, document.filename)
-                except Exception as exc:
-                    LOGGER.warning("Failed to download PDF %s: %s", pdf_url, exc)
+        async with self._fetch_page(task.url) as result:
+            if not result:
+                return
+            parsed = await self._parse(result)
+            collected = self._collect_pdfs(result, parsed)
+            pending = [
+                (pdf_url, context)
+                for pdf_url, context in collected
+                if pdf_url not in self.downloaded and pdf_url not in self.pending_pdfs
+            ]
+            self.pending_pdfs.update(pdf_url for pdf_url, _ in pending)
+            try:
+                outcomes = await asyncio.gather(
+                    *(self._download_pdf(pdf_url, context, result) for pdf_url, context in pending),
+                    return_exceptions=True,
+                )
+            finally:
+                self.pending_pdfs.difference_update(pdf_url for pdf_url, _ in pending)
+            for (pdf_url, _), outcome in zip(pending, outcomes):
+                if isinstance(outcome, BaseException):
+                    LOGGER.warning("Failed to download PDF %s: %s", pdf_url, outcome)
+                    continue
+                self.downloaded[pdf_url] = outcome
+                LOGGER.info("Downloaded %s -> %s", pdf_url, outcome.filename)
         if task.depth < self.config.max_depth:
-            for link in self._extract_links(result):
-                if link not in self.visited:
-                    queue.append(PageTask(link, task.depth + 1))
-
-    async def _fetch_page(self, url: str) -> Optional[FetchResult]:
-        loop = asyncio.get_running_loop()
-        result = await loop.run_in_executor(None, self.static_fetcher.fetch, url)
-        if result and not self._requires_playwright(result):
-            return result
-        if self.playwright_fetcher:
+            # Links already handled as PDFs would only be fetched a second time as pages.
+            pdf_urls = {pdf_url for pdf_url, _ in collected}
+            for link in parsed.links:
+                if link not in pdf_urls and link not in self.downloaded:
+                    self.frontier.push(link, task.depth + 1)
+
+    async def _download_pdf(self, pdf_url: str, context: Optional[str], result: FetchResult) -> PDFDocument:
+        if result.response is not None and pdf_url == result.final_url:
+            # The page fetch sniffed a PDF and _fetch_page still holds its throttle slot; keep streaming its body.
+            response, result.response = result.response, None
+            return await self.storage.build_document(
+                url=pdf_url,
+                source_page=result.final_url,
+                context=context,
+                response=response,
+                head=result.head,
+            )
+        async with self._throttle(pdf_url):
+            return await self.storage.build_document(
+                url=pdf_url,
+                source_page=result.final_url,
+                context=context,
+            )
+
+    @asynccontextmanager
+    async def _throttle(self, url: str) -> AsyncIterator[None]:
+        host = urlparse(url).netloc
+        host_sem = self.host_sems.setdefault(host, asyncio.Semaphore(self.config.host_concurrency))
+        async with self.global_sem, host_sem:
+            yield
+
+    @asynccontextmanager
+    async def _fetch_page(self, url: str) -> AsyncIterator[Optional[FetchResult]]:
+        """Yield the fetch result for ``url`` and release its response on exit.
+
+        A response sniffed as a PDF is still open, so the throttle slot is held until the caller has
+        streamed it. Taking a second slot for the download could leave every connection waiting on it.
+        """
+        async with self._throttle(url):
+            result = await self.static_fetcher.fetch(url)
+            if result and result.response is not None:
+                try:
+                    yield result
+                finally:
+                    result.release()
+                return
+        static_ok = result and (result.detected_pdfs or not (await self._parse(result)).requires_playwright)
+        if not static_ok and self.playwright_fetcher:
             LOGGER.debug("Falling back to Playwright for %s", url)
-            dynamic_result = await self.playwright_fetcher.fetch(url)
+            async with self._throttle(url):
+                dynamic_result = await self.playwright_fetcher.fetch(url)
             if dynamic_result:
-                return dynamic_result
-        return result
+                result = dynamic_result
+        try:
+            yield result
+        finally:
+            if result:
+                result.release()
 
-    def _requires_playwright(self, result: FetchResult) -> bool:
-        if result.detected_pdfs:
-            return False
-        soup = BeautifulSoup(result.content, "html.parser")
-        if soup.find_all(lambda tag: tag.name in {"a", "iframe", "embed"} and tag.get("href") or tag.get("src")):
-            return False
-        script_tags = soup.find_all("script")
-        if len(script_tags) > 10 and len(soup.get_text(strip=True)) < 200:
-            return True
-        if soup.find(attrs={"data-reactroot": True}) or soup.find(attrs={"data-reactid": True}):
-            return True
-        if soup.find(attrs={"ng-app": True}) or soup.find(id="app"):
-            return True
-        return False
-
-    def _extract_links(self, result: FetchResult) -> Iterable[str]:
-        soup = BeautifulSoup(result.content, "html.parser")
-        base_url = result.final_url
-        seen: Set[str] = set()
-        for tag in soup.find_all("a", href=True):
-            href = tag["href"]
-            if href.startswith("mailto:") or href.startswith("javascript:"):
-                continue
-            absolute = self._normalize(urljoin(base_url, href))
-            if self._is_same_domain(absolute) and absolute not in seen:
-                seen.add(absolute)
-                yield absolute
-
-    def _extract_pdfs(self, result: FetchResult) -> List[Tuple[str, Optional[str]]]:
+    async def _parse(self, result: FetchResult) -> ParsedPage:
+        if result.parsed is None and (not result.content or "application/pdf" in (result.content_type or "")):
+            # PDF responses carry no markup; their URL already sits in detected_pdfs.
+            result.parsed = ParsedPage(links=[], pdfs=[], requires_playwright=False)
+        if result.parsed is None:
+            loop = asyncio.get_running_loop()
+            result.parsed = await loop.run_in_executor(
+                self.parse_executor, _parse_page, result.content, result.final_url, self.allowed_domains
+            )
+        return result.parsed
+
+    def _collect_pdfs(self, result: FetchResult, parsed: ParsedPage) -> List[Tuple[str, Optional[str]]]:
         pdfs: Dict[str, Optional[str]] = {}
         if result.detected_pdfs:
             for url in result.detected_pdfs.values():
                 pdfs[url] = "Detected via network request"
-        soup = BeautifulSoup(result.content, "html.parser")
-        base_url = result.final_url
-        for tag in soup.find_all(["a", "iframe", "embed", "object" ]):
-            url_attr = tag.get("href") or tag.get("src") or tag.get("data")
-            if not url_attr:
-                continue
-            absolute = self._normalize(urljoin(base_url, url_attr))
-            if not absolute.lower().endswith(".pdf") and tag.get("type") != "application/pdf":
-                continue
-            context = self._describe_context(tag)
-            pdfs.setdefault(absolute, context)
+        for url, context in parsed.pdfs:
+            pdfs.setdefault(url, context)
         return list(pdfs.items())
 
-    def _describe_context(self, tag) -> Optional[str]:
-        text = tag.get_text(" ", strip=True)
-        if text:
-            return text
-        parent = tag.find_parent()
-        if parent:
-            return parent.get_text(" ", strip=True)[:200]
-        return None
-
-    def _normalize(self, url: str) -> str:
-        clean, _ = urldefrag(url)
-        return clean
-
-    def _is_same_domain(self, url: str) -> bool:
-        netloc = urlparse(url).netloc
-        return netloc in self.allowed_domains
-
-    def _is_allowed(self, url: str) -> bool:
+    async def _is_allowed(self, url: str) -> bool:
         if not self.config.respect_robots_txt:
             return True
         parsed = urlparse(url)
         base = f"{parsed.scheme}://{parsed.netloc}"
-        robot = self.robots_cache.get(base)
-        if robot is None:
-            from urllib import robotparser
-
-            rp = robotparser.RobotFileParser()
-            rp.set_url(urljoin(base, "/robots.txt"))
-            try:
-                rp.read()
-            except Exception as exc:  # pragma: no cover
-                LOGGER.debug("Failed to read robots.txt for %s: %s", base, exc)
-                self.robots_cache[base] = None
-                return True
-            self.robots_cache[base] = rp
-            robot = rp
+        if base not in self.robots_cache:
+            async with self._robots_locks.setdefault(base, asyncio.Lock()):
+                if base not in self.robots_cache:
+                    self.robots_cache[base] = await self._fetch_robots(base)
+        robot = self.robots_cache[base]
         if robot is None:
             return True
         return robot.can_fetch("UniversalPDFCrawler", url)
 
+    async def _fetch_robots(self, base: str) -> Optional[robotparser.RobotFileParser]:
+        rp = robotparser.RobotFileParser(urljoin(base, "/robots.txt"))
+        try:
+            async with self._throttle(base), self.static_fetcher.session.get(rp.url, timeout=self.static_fetcher.timeout) as response:
+                if response.status in (401, 403):
+                    rp.disallow_all = True
+                elif response.status >= 400:
+                    rp.allow_all = True
+                else:
+                    rp.parse((await response.text(errors="replace")).splitlines())
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            LOGGER.debug("Failed to read robots.txt for %s: %s", base, exc)
+            return None
+        return rp
+
 
 async def crawl_async(config: CrawlConfig, verbose: bool = False) -> List[PDFDocument]:
     configure_logging(verbose)
-    static = StaticFetcher(timeout=config.timeout, retries=config.retries)
-    async with playwright_fetcher(timeout=config.timeout, auth=config.auth) as playwright:
-        session = CrawlSession(config, static, playwright)
-        return await session.run()
+    async with http_session(concurrency=config.concurrency) as http:
+        static = StaticFetcher(http, timeout=config.timeout, retries=config.retries)
+        async with playwright_fetcher(timeout=config.timeout, auth=config.auth, pool_size=config.concurrency) as playwright:
+            session = CrawlSession(config, http, static, playwright)
+            return await session.run()
 
 
 def crawl(config: CrawlConfig, verbose: bool = False) -> List[PDFDocument]:
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.run(crawl_async(config, verbose=verbose))
+    if sys.version_info >= (3, 11):
+        with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+            return runner.run(crawl_async(config, verbose=verbose))
+    uvloop.install()
     return asyncio.run(crawl_async(config, verbose=verbose))
@@ -1,17 +1,28 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from dataclasses import dataclass
 from typing import AsyncIterator, Dict, Optional
 
-import requests
-from playwright.async_api import BrowserContext, Playwright, async_playwright
+import aiohttp
+from playwright.async_api import BrowserContext, Page, Playwright, Route, async_playwright
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 
 from .config import AuthConfig
+from .models import ParsedPage
 
 LOGGER = logging.getLogger("pdf_crawler.fetchers")
 
+USER_AGENT = "UniversalPDFCrawler/0.1"
+PDF_MAGIC = b"%PDF-"
+PEEK_SIZE = 1024
+# Subresources that never lead to PDFs; scripts and XHR stay enabled so SPAs still render.
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "font", "media", "stylesheet"})
+PDF_SELECTOR = "a[href$='.pdf' i], iframe[src$='.pdf' i], embed[type='application/pdf'], object[type='application/pdf']"
+PDF_SELECTOR_WAIT_MS = 2000
+
 
 @dataclass
 class FetchResult:
@@ -21,54 +32,93 @@ class FetchResult:
     from_playwright: bool = False
     detected_pdfs: Dict[str, str] | None = None
     content_type: str | None = None
+    parsed: ParsedPage | None = None
+    response: aiohttp.ClientResponse | None = None
+    head: bytes = b""
+
+    def release(self) -> None:
+        if self.response is not None:
+            self.response.release()
+            self.response = None
 
 
 class StaticFetcher:
-    def __init__(self, timeout: int = 30, retries: int = 2, session: Optional[requests.Session] = None):
-        self.timeout = timeout
+    def __init__(self, session: aiohttp.ClientSession, timeout: int = 30, retries: int = 2):
+        self.session = session
+        self.timeout = aiohttp.ClientTimeout(connect=timeout, sock_read=timeout)
         self.retries = retries
-        self.session = session or requests.Session()
-        self.session.headers.setdefault("User-Agent", "UniversalPDFCrawler/0.1")
 
-    def fetch(self, url: str) -> Optional[FetchResult]:
+    async def fetch(self, url: str) -> Optional[FetchResult]:
         for attempt in range(self.retries + 1):
+            response: Optional[aiohttp.ClientResponse] = None
             try:
-                response = self.session.get(url, timeout=self.timeout)
+                response = await self.session.get(url, timeout=self.timeout)
                 response.raise_for_status()
+                final_url = str(response.url)
                 content_type = response.headers.get("content-type", "").lower()
-                if "application/pdf" in content_type:
+                head = await self._peek(response)
+                if head.startswith(PDF_MAGIC) or "application/pdf" in content_type:
+                    # Hand the open response over so storage can keep streaming it.
+                    pdf_response, response = response, None
                     return FetchResult(
                         url=url,
                         content="",
-                        final_url=response.url,
-                        detected_pdfs={response.url: response.url},
-                        content_type=content_type,
+                        final_url=final_url,
+                        detected_pdfs={final_url: final_url},
+                        content_type="application/pdf",
+                        response=pdf_response,
+                        head=head,
                     )
+                body = head + await response.content.read()
                 return FetchResult(
                     url=url,
-                    content=response.text,
-                    final_url=response.url,
+                    content=self._decode(body, response.charset),
+                    final_url=final_url,
                     content_type=content_type,
                 )
-            except requests.RequestException as exc:
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
                 LOGGER.warning("Static fetch failed for %s (attempt %s/%s): %s", url, attempt + 1, self.retries + 1, exc)
+            finally:
+                if response is not None:
+                    response.release()
         return None
 
+    async def _peek(self, response: aiohttp.ClientResponse) -> bytes:
+        head = b""
+        while len(head) < PEEK_SIZE and not response.content.at_eof():
+            chunk = await response.content.read(PEEK_SIZE - len(head))
+            if not chunk:
+                break
+            head += chunk
+        return head
+
+    def _decode(self, body: bytes, charset: Optional[str]) -> str:
+        try:
+            return body.decode(charset or "utf-8", errors="replace")
+        except LookupError:
+            return body.decode("utf-8", errors="replace")
+
 
 class PlaywrightFetcher:
-    def __init__(self, timeout: int = 30, auth: Optional[AuthConfig] = None):
+    def __init__(self, timeout: int = 30, auth: Optional[AuthConfig] = None, pool_size: int = 1):
         self.timeout = timeout
         self.auth = auth
+        self.pool_size = max(1, pool_size)
         self._playwright: Optional[Playwright] = None
         self._browser_context: Optional[BrowserContext] = None
+        self._page_pool: Optional[asyncio.Queue[Page]] = None
 
     async def __aenter__(self) -> "PlaywrightFetcher":
         self._playwright = await async_playwright().start()
         browser = await self._playwright.chromium.launch(headless=True)
         context_args: Dict[str, object] = {"ignore_https_errors": True}
         self._browser_context = await browser.new_context(**context_args)
+        await self._browser_context.route("**/*", self._block_heavy_resources)
         if self.auth:
             await self._perform_login(self.auth)
+        self._page_pool = asyncio.Queue()
+        for _ in range(self.pool_size):
+            self._page_pool.put_nowait(await self._browser_context.new_page())
         return self
 
     async def __aexit__(self, exc_type, exc, tb) -> None:
@@ -77,6 +127,12 @@ class PlaywrightFetcher:
         if self._playwright:
             await self._playwright.stop()
 
+    async def _block_heavy_resources(self, route: Route) -> None:
+        if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+            await route.abort()
+        else:
+            await route.continue_()
+
     async def _perform_login(self, auth: AuthConfig) -> None:
         assert self._browser_context is not None
         page = await self._browser_context.new_page()
@@ -95,9 +151,9 @@ class PlaywrightFetcher:
         LOGGER.info("Login successful")
 
     async def fetch(self, url: str) -> Optional[FetchResult]:
-        if not self._browser_context:
+        if not self._browser_context or self._page_pool is None:
             raise RuntimeError("PlaywrightFetcher must be used as an async context manager")
-        page = await self._browser_context.new_page()
+        page = await self._page_pool.get()
         pdf_urls: Dict[str, str] = {}
 
         def handle_response(response):
@@ -107,7 +163,11 @@ class PlaywrightFetcher:
 
         page.on("response", handle_response)
         try:
-            await page.goto(url, wait_until="networkidle", timeout=self.timeout * 1000)
+            await page.goto(url, wait_until="domcontentloaded", timeout=self.timeout * 1000)
+            try:
+                await page.wait_for_selector(PDF_SELECTOR, state="attached", timeout=PDF_SELECTOR_WAIT_MS)
+            except PlaywrightTimeoutError:
+                pass
             content = await page.content()
             for item in pdf_urls:
                 LOGGER.debug("Detected PDF via network: %s", item)
@@ -123,14 +183,26 @@ class PlaywrightFetcher:
             LOGGER.warning("Playwright fetch failed for %s: %s", url, exc)
             return None
         finally:
-            await page.close()
+            page.remove_listener("response", handle_response)
+            if page.is_closed():
+                page = await self._browser_context.new_page()
+            self._page_pool.put_nowait(page)
 
 
 @asynccontextmanager
-async def playwright_fetcher(timeout: int = 30, auth: Optional[AuthConfig] = None) -> AsyncIterator[PlaywrightFetcher]:
-    fetcher = PlaywrightFetcher(timeout=timeout, auth=auth)
+async def playwright_fetcher(
+    timeout: int = 30, auth: Optional[AuthConfig] = None, pool_size: int = 1
+) -> AsyncIterator[PlaywrightFetcher]:
+    fetcher = PlaywrightFetcher(timeout=timeout, auth=auth, pool_size=pool_size)
     await fetcher.__aenter__()
     try:
         yield fetcher
     finally:
         await fetcher.__aexit__(None, None, None)
+
+
+@asynccontextmanager
+async def http_session(concurrency: int = 3) -> AsyncIterator[aiohttp.ClientSession]:
+    connector = aiohttp.TCPConnector(limit=concurrency * 4, keepalive_timeout=30, ttl_dns_cache=300)
+    async with aiohttp.ClientSession(connector=connector, headers={"User-Agent": USER_AGENT}) as session:
+        yield session
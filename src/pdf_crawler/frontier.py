@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+from typing import List, Tuple
+
+PENDING = 0
+IN_FLIGHT = 1
+DONE = 2
+
+
+class Frontier:
+    """Disk-backed crawl frontier; the ``url`` primary key doubles as the exact seen-set."""
+
+    def __init__(self, path: Path, resume: bool = False, batch_size: int = 256):
+        self.batch_size = batch_size
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS frontier ("
+            "url TEXT PRIMARY KEY, depth INTEGER NOT NULL, status INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS frontier_status ON frontier (status)")
+        if resume:
+            # Pages that were in flight when the previous run stopped are crawled again.
+            self._conn.execute("UPDATE frontier SET status = ? WHERE status = ?", (PENDING, IN_FLIGHT))
+        else:
+            self._conn.execute("DELETE FROM frontier")
+        self._conn.commit()
+        self._pushed: List[Tuple[str, int]] = []
+        self._completed: List[Tuple[int, str]] = []
+
+    def push(self, url: str, depth: int) -> None:
+        self._pushed.append((url, depth))
+        if len(self._pushed) >= self.batch_size:
+            self.flush()
+
+    def complete(self, url: str) -> None:
+        self._completed.append((DONE, url))
+        if len(self._completed) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pushed and not self._completed:
+            return
+        with self._conn:
+            self._conn.executemany("INSERT OR IGNORE INTO frontier (url, depth) VALUES (?, ?)", self._pushed)
+            self._conn.executemany("UPDATE frontier SET status = ? WHERE url = ?", self._completed)
+        self._pushed.clear()
+        self._completed.clear()
+
+    def pop_batch(self, limit: int) -> List[Tuple[str, int]]:
+        # Pushed URLs must land before the read; completions stay buffered until a full batch or close().
+        with self._conn:
+            if self._pushed:
+                self._conn.executemany("INSERT OR IGNORE INTO frontier (url, depth) VALUES (?, ?)", self._pushed)
+                self._pushed.clear()
+            rows = self._conn.execute(
+                "SELECT url, depth FROM frontier WHERE status = ? ORDER BY rowid LIMIT ?",
+                (PENDING, limit),
+            ).fetchall()
+            if rows:
+                self._conn.executemany("UPDATE frontier SET status = ? WHERE url = ?", [(IN_FLIGHT, url) for url, _ in rows])
+        return rows
+
+    def close(self) -> None:
+        self.flush()
+        self._conn.close()
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Tuple
 
 
 @dataclass
@@ -14,3 +14,10 @@ class PDFDocument:
     context: Optional[str]
     content_type: Optional[str] = None
     size_bytes: Optional[int] = None
+
+
+@dataclass
+class ParsedPage:
+    links: List[str]
+    pdfs: List[Tuple[str, Optional[str]]]
+    requires_playwright: bool
@@ -1,56 +1,138 @@
 from __future__ import annotations
 
+import hashlib
 import logging
+import os
 from pathlib import Path
-import requests
+from typing import Dict, List, Optional, Set
+
+import aiofiles
+import aiohttp
 
 from .models import PDFDocument
 from .utils import ensure_directory, extract_pdf_title, safe_filename
 
 LOGGER = logging.getLogger("pdf_crawler.storage")
 
+DOWNLOAD_TIMEOUT = aiohttp.ClientTimeout(connect=60, sock_read=60)
+# Large chunks keep aiofiles thread hops and write syscalls per PDF low.
+CHUNK_SIZE = 256 * 1024
+
 
 class PDFStorage:
-    def __init__(self, base_dir: Path):
+    def __init__(self, base_dir: Path, session: aiohttp.ClientSession):
         self.base_dir = base_dir
+        self.session = session
+        self._domain_names: Dict[Path, Set[str]] = {}
+        self._digests: Dict[bytes, Path] = {}
+        self._titles: Dict[Path, Optional[str]] = {}
+        # PDFs left by an earlier run, keyed by size and hashed only when a download of that size arrives.
+        self._on_disk: Dict[int, List[Path]] = {}
         ensure_directory(self.base_dir)
 
     def _domain_directory(self, url: str) -> Path:
         domain = url.split("//", 1)[-1].split("/", 1)[0]
         path = self.base_dir / domain
-        ensure_directory(path)
+        if path not in self._domain_names:
+            ensure_directory(path)
+            names: Set[str] = set()
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".pdf"):
+                        names.add(entry.name[:-4])
+                        self._on_disk.setdefault(entry.stat().st_size, []).append(Path(entry.path))
+            self._domain_names[path] = names
         return path
 
-    def save_pdf(self, url: str, source_page: str) -> Path:
-        response = requests.get(url, stream=True, timeout=60)
-        response.raise_for_status()
-        filename_hint = url.rsplit("/", 1)[-1].replace(".pdf", "")
-        domain_dir = self._domain_directory(source_page)
-        existing_names = {f.stem for f in domain_dir.glob("*.pdf")}
-        name = safe_filename(filename_hint or "document", existing_names)
+    def _match_on_disk(self, digest: bytes, size: int) -> Optional[Path]:
+        candidates = self._on_disk.get(size)
+        while candidates:
+            path = candidates.pop()
+            hasher = hashlib.sha256()
+            try:
+                with path.open("rb") as fh:
+                    for chunk in iter(lambda: fh.read(CHUNK_SIZE), b""):
+                        hasher.update(chunk)
+            except OSError:
+                continue
+            self._digests.setdefault(hasher.digest(), path)
+            if hasher.digest() == digest:
+                self._titles[path] = extract_pdf_title(path)
+                return path
+        return None
+
+    async def save_pdf(self, url: str, source_page: str) -> Path:
+        response = await self.session.get(url, timeout=DOWNLOAD_TIMEOUT)
+        try:
+            response.raise_for_status()
+        except BaseException:
+            response.release()
+            raise
+        return await self.save_pdf_stream(response, b"", url=url, source_page=source_page)
+
+    async def save_pdf_stream(self, response: aiohttp.ClientResponse, head: bytes, *, url: str, source_page: str) -> Path:
+        """Write ``head`` followed by the rest of ``response``; the response is released afterwards.
+
+        Content already stored under another URL, in this run or an earlier one in the same output directory,
+        is not kept twice: the earlier file's path is returned instead.
+        """
+        async with response:
+            filename_hint = url.rsplit("/", 1)[-1].replace(".pdf", "")
+            domain_dir = self._domain_directory(source_page)
+            names = self._domain_names[domain_dir]
+            name = safe_filename(filename_hint or "document", names)
+            names.add(name)
+            partial = domain_dir / f"{name}.part"
+            hasher = hashlib.sha256()
+            try:
+                async with aiofiles.open(partial, "wb") as fh:
+                    if head:
+                        hasher.update(head)
+                        await fh.write(head)
+                    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                        hasher.update(chunk)
+                        await fh.write(chunk)
+            except BaseException:
+                names.discard(name)
+                partial.unlink(missing_ok=True)
+                raise
+        digest = hasher.digest()
+        duplicate = self._digests.get(digest) or self._match_on_disk(digest, partial.stat().st_size)
+        if duplicate is not None:
+            LOGGER.debug("%s has the same content as %s", url, duplicate)
+            partial.unlink()
+            names.discard(name)
+            return duplicate
+        title = extract_pdf_title(partial)
+        if title:
+            names.discard(name)
+            name = safe_filename(title, existing=names, allow_unicode=True)
+            names.add(name)
         target = domain_dir / f"{name}.pdf"
-        with target.open("wb") as fh:
-            for chunk in response.iter_content(chunk_size=8192):
-                fh.write(chunk)
+        partial.rename(target)
+        self._digests[digest] = target
+        self._titles[target] = title
         return target
 
-    def build_document(self, *, url: str, source_page: str, context: str | None) -> PDFDocument:
-        saved_path = self.save_pdf(url, source_page)
-        size = saved_path.stat().st_size
-        title = extract_pdf_title(saved_path)
-        if title:
-            existing_names = {f.stem for f in saved_path.parent.glob("*.pdf")}
-            proposed_name = safe_filename(title, existing=existing_names, allow_unicode=True)
-            proposed = saved_path.with_name(f"{proposed_name}.pdf")
-            if proposed != saved_path and not proposed.exists():
-                saved_path.rename(proposed)
-                saved_path = proposed
+    async def build_document(
+        self,
+        *,
+        url: str,
+        source_page: str,
+        context: str | None,
+        response: aiohttp.ClientResponse | None = None,
+        head: bytes = b"",
+    ) -> PDFDocument:
+        if response is not None:
+            saved_path = await self.save_pdf_stream(response, head, url=url, source_page=source_page)
+        else:
+            saved_path = await self.save_pdf(url, source_page)
         document = PDFDocument(
             source_page=source_page,
             url=url,
             filename=saved_path,
-            title=title,
+            title=self._titles.get(saved_path),
             context=context,
-            size_bytes=size,
+            size_bytes=saved_path.stat().st_size,
         )
         return document
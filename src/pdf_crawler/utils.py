@@ -4,12 +4,40 @@ import logging
 import os
 import re
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import Iterable, List, Optional, Tuple
 
 from pypdf import PdfReader
 
 LOGGER = logging.getLogger("pdf_crawler")
 
+_WS_UNI = re.compile(r"[\s/]+", re.UNICODE)
+_STRIP_UNI = re.compile(r"[^\w.-]", re.UNICODE)
+_WS = re.compile(r"[\s/]+")
+_STRIP = re.compile(r"[^\w.-]")
+
+PDF_TAIL_SIZE = 1024
+PDF_INFO_READ_SIZE = 4096
+PDF_MAX_XREF_SECTIONS = 8
+_STARTXREF = re.compile(rb"startxref\s+(\d+)")
+_XREF_HEADER = re.compile(rb"\s*(\d+)\s+(\d+)[ \t]*(?:\r\n|\r|\n)")
+_XREF_ENTRY = re.compile(rb"(\d{10}) (\d{5}) ([nf])")
+_INFO_REF = re.compile(rb"/Info\s+(\d+)\s+(\d+)\s+R")
+_PREV = re.compile(rb"/Prev\s+(\d+)")
+_TITLE = re.compile(rb"/Title(?![A-Za-z0-9])\s*")
+# PDFDocEncoding (PDF 32000-1 Annex D) agrees with Latin-1 except for these code points.
+_PDFDOC_OVERRIDES = {
+    0x18: "\u02d8", 0x19: "\u02c7", 0x1A: "\u02c6", 0x1B: "\u02d9", 0x1C: "\u02dd", 0x1D: "\u02db",
+    0x1E: "\u02da", 0x1F: "\u02dc", 0x80: "\u2022", 0x81: "\u2020", 0x82: "\u2021", 0x83: "\u2026",
+    0x84: "\u2014", 0x85: "\u2013", 0x86: "\u0192", 0x87: "\u2044", 0x88: "\u2039", 0x89: "\u203a",
+    0x8A: "\u2212", 0x8B: "\u2030", 0x8C: "\u201e", 0x8D: "\u201c", 0x8E: "\u201d", 0x8F: "\u2018",
+    0x90: "\u2019", 0x91: "\u201a", 0x92: "\u2122", 0x93: "\ufb01", 0x94: "\ufb02", 0x95: "\u0141",
+    0x96: "\u0152", 0x97: "\u0160", 0x98: "\u0178", 0x99: "\u017d", 0x9A: "\u0131", 0x9B: "\u0142",
+    0x9C: "\u0153", 0x9D: "\u0161", 0x9E: "\u017e", 0xA0: "\u20ac",
+}
+# Bytes pypdf treats as undefined; titles containing them are left to PdfReader.
+_PDFDOC_UNDEFINED = frozenset(b"\x16\x7f\x9f\xad")
+_PDF_ESCAPES = {ord("n"): 0x0A, ord("r"): 0x0D, ord("t"): 0x09, ord("b"): 0x08, ord("f"): 0x0C}
+
 
 def ensure_directory(path: Path) -> None:
     path.mkdir(parents=True, exist_ok=True)
@@ -18,11 +46,11 @@ def ensure_directory(path: Path) -> None:
 def slugify(value: str, allow_unicode: bool = False) -> str:
     value = str(value)
     if allow_unicode:
-        value = re.sub(r"[\s/]+", "_", value, flags=re.UNICODE)
-        value = re.sub(r"[^\w.-]", "", value, flags=re.UNICODE)
+        value = _WS_UNI.sub("_", value)
+        value = _STRIP_UNI.sub("", value)
         return value.strip("-_.")
-    value = re.sub(r"[\s/]+", "-", value)
-    value = re.sub(r"[^\w.-]", "", value)
+    value = _WS.sub("-", value)
+    value = _STRIP.sub("", value)
     return value.strip("-_.")
 
 
@@ -30,7 +58,7 @@ def safe_filename(base: str, existing: Iterable[str], default: str = "document",
     base = slugify(base, allow_unicode=allow_unicode) if base else slugify(default, allow_unicode=allow_unicode)
     candidate = base
     index = 1
-    existing_set = set(existing)
+    existing_set = existing if isinstance(existing, (set, frozenset)) else set(existing)
     while candidate in existing_set:
         index += 1
         candidate = f"{base}-{index}"
@@ -39,15 +67,157 @@ def safe_filename(base: str, existing: Iterable[str], default: str = "document",
 
 def extract_pdf_title(path: Path) -> Optional[str]:
     try:
-        reader = PdfReader(str(path))
-        info = reader.metadata
-        if info and info.title:
-            return slugify(info.title, allow_unicode=True)
+        try:
+            title = _read_info_title(path)
+        except (OSError, ValueError) as exc:
+            LOGGER.debug("Falling back to a full parse for %s: %s", path, exc)
+            info = PdfReader(str(path), strict=False).metadata
+            title = info.title if info else None
+        if title:
+            return slugify(title, allow_unicode=True)
     except Exception as exc:  # pragma: no cover - best effort only
         LOGGER.debug("Failed to read PDF metadata for %s: %s", path, exc)
     return None
 
 
+def _read_info_title(path: Path) -> Optional[str]:
+    """Read ``/Info /Title`` via the trailer and xref table only; raise ``ValueError`` when the layout is unsupported."""
+    with path.open("rb") as fh:
+        fh.seek(0, os.SEEK_END)
+        fh.seek(max(0, fh.tell() - PDF_TAIL_SIZE))
+        offsets = _STARTXREF.findall(fh.read())
+        if not offsets:
+            raise ValueError("startxref not found")
+        offset = int(offsets[-1])
+        info_ref: Optional[Tuple[int, int]] = None
+        for _ in range(PDF_MAX_XREF_SECTIONS):
+            subsections, trailer = _read_xref_section(fh, offset)
+            if info_ref is None:
+                if b"/Encrypt" in trailer:
+                    raise ValueError("encrypted document")
+                ref = _INFO_REF.search(trailer)
+                if not ref:
+                    return None
+                info_ref = (int(ref[1]), int(ref[2]))
+            object_offset = _xref_lookup(fh, subsections, info_ref[0])
+            if object_offset is not None:
+                break
+            prev = _PREV.search(trailer)
+            if not prev:
+                raise ValueError("Info object missing from xref")
+            offset = int(prev[1])
+        else:
+            raise ValueError("too many xref sections")
+        fh.seek(object_offset)
+        data = fh.read(PDF_INFO_READ_SIZE)
+    header = re.match(rb"\s*%d\s+%d\s+obj" % info_ref, data)
+    if not header:
+        raise ValueError("Info object not at xref offset")
+    body = data[header.end():]
+    end = body.find(b"endobj")
+    if end >= 0:
+        body = body[:end]
+    title = _TITLE.search(body)
+    if not title:
+        if end < 0:
+            raise ValueError("Info object larger than read window")
+        return None
+    return _decode_pdf_text(_read_pdf_string(body, title.end()))
+
+
+def _read_xref_section(fh, offset: int) -> Tuple[List[Tuple[int, int, int]], bytes]:
+    fh.seek(offset)
+    if fh.read(4) != b"xref":
+        raise ValueError("not a classic xref table")
+    position = offset + 4
+    subsections: List[Tuple[int, int, int]] = []
+    while True:
+        fh.seek(position)
+        header = _XREF_HEADER.match(fh.read(64))
+        if not header:
+            break
+        start, count = int(header[1]), int(header[2])
+        entries = position + header.end()
+        subsections.append((start, count, entries))
+        position = entries + count * 20
+    fh.seek(position)
+    trailer = fh.read(PDF_TAIL_SIZE).lstrip()
+    if not trailer.startswith(b"trailer"):
+        raise ValueError("trailer not found after xref table")
+    end = trailer.find(b"startxref")
+    return subsections, trailer if end < 0 else trailer[:end]
+
+
+def _xref_lookup(fh, subsections: List[Tuple[int, int, int]], number: int) -> Optional[int]:
+    for start, count, entries in subsections:
+        if start <= number < start + count:
+            fh.seek(entries + (number - start) * 20)
+            entry = _XREF_ENTRY.match(fh.read(20))
+            if not entry or entry[3] != b"n":
+                raise ValueError("unusable xref entry")
+            return int(entry[1])
+    return None
+
+
+def _read_pdf_string(data: bytes, pos: int) -> bytes:
+    if data[pos:pos + 1] not in (b"(", b"<") or data[pos:pos + 2] == b"<<":
+        raise ValueError("Title is not a direct string")
+    if data[pos:pos + 1] == b"<":
+        end = data.find(b">", pos)
+        if end < 0:
+            raise ValueError("unterminated hex string")
+        digits = re.sub(rb"\s", b"", data[pos + 1:end])
+        if len(digits) % 2:
+            digits += b"0"
+        return bytes.fromhex(digits.decode("ascii"))
+    out = bytearray()
+    depth = 0
+    i = pos
+    while i < len(data):
+        char = data[i]
+        i += 1
+        if char == 0x5C:  # backslash
+            if i >= len(data):
+                break
+            escaped = data[i]
+            i += 1
+            if escaped in _PDF_ESCAPES:
+                out.append(_PDF_ESCAPES[escaped])
+            elif 0x30 <= escaped <= 0x37:
+                octal = escaped - 0x30
+                for _ in range(2):
+                    if i < len(data) and 0x30 <= data[i] <= 0x37:
+                        octal = octal * 8 + data[i] - 0x30
+                        i += 1
+                out.append(octal & 0xFF)
+            elif escaped == 0x0D:
+                if data[i:i + 1] == b"\n":
+                    i += 1
+            elif escaped != 0x0A:
+                out.append(escaped)
+            continue
+        if char == 0x28:  # (
+            depth += 1
+            if depth == 1:
+                continue
+        elif char == 0x29:  # )
+            depth -= 1
+            if depth == 0:
+                return bytes(out)
+        out.append(char)
+    raise ValueError("unterminated literal string")
+
+
+def _decode_pdf_text(raw: bytes) -> str:
+    if raw.startswith(b"\xfe\xff"):
+        return raw[2:].decode("utf-16-be", errors="replace")
+    if raw.startswith(b"\xef\xbb\xbf"):
+        return raw[3:].decode("utf-8", errors="replace")
+    if not _PDFDOC_UNDEFINED.isdisjoint(raw):
+        raise ValueError("byte undefined in PDFDocEncoding")
+    return raw.decode("latin-1").translate(_PDFDOC_OVERRIDES)
+
+
 def configure_logging(verbose: bool = False) -> None:
     level = logging.DEBUG if verbose else logging.INFO
     logging.basicConfig(
@@ -0,0 +1,52 @@
+from urllib.parse import urldefrag, urljoin, urlsplit
+
+import pytest
+
+from pdf_crawler.crawler import _resolve, _split_base
+
+BASES = [
+    "http://a/b/c/d;p?q",
+    "https://example.com/docs/index.html",
+    "https://example.com/docs/",
+    "https://example.com",
+    "https://example.com?page=2",
+    "https://Example.COM:8443/a/b#frag",
+]
+
+HREFS = [
+    # RFC 3986 section 5.4 examples
+    "g:h", "g", "./g", "g/", "/g", "//g", "?y", "g?y", "#s", "g#s", "g?y#s", ";x", "g;x", "g;x?y#s",
+    "", ".", "./", "..", "../", "../g", "../..", "../../", "../../g", "../../../g", "/./g", "/../g",
+    "g.", ".g", "g..", "..g", "./../g", "./g/.", "g/./h", "g/../h", "g;x=1/./y", "g;x=1/../y",
+    "g?y/./x", "g?y/../x", "http:g",
+    # Bare queries and empty authorities
+    "?", "//", "///", "///x", "//?q", "//#f", "https:///x",
+    # Absolute links
+    "http://host/report.pdf", "https://other.org/a/b.pdf?download=1", "//cdn.example.com/x.pdf",
+    "mailto:someone@example.com", "javascript:void(0)", "data:text/plain,hi",
+    # Whitespace and fragments
+    "  report.pdf  ", "report.pdf#page=2", "/files/report.PDF?x=1#y",
+    # Tabs and line breaks, which urlsplit removes
+    "/files/a\nb.pdf", "rep\tort.pdf", "?a\r\nb", "//cdn.exa\nmple.com/x.pdf", "g/\n../h", "\n\t/g",
+]
+
+
+@pytest.mark.parametrize("base", BASES)
+@pytest.mark.parametrize("href", HREFS)
+def test_resolve_matches_urljoin(base, href):
+    expected = urldefrag(urljoin(base, href.strip())).url
+    assert _resolve(href, _split_base(base)) == (expected, urlsplit(expected).netloc)
+
+
+@pytest.mark.parametrize(
+    "href, expected",
+    [
+        ("HTTP://host/x", ("http://host/x", "host")),
+        ("Ftp://host/x", ("ftp://host/x", "host")),
+        ("HTTPS://Host/Report.pdf", ("https://Host/Report.pdf", "Host")),
+        ("ht\ttps://host/x", ("https://host/x", "host")),
+    ],
+)
+def test_resolve_normalizes_scheme(href, expected):
+    # urljoin only cleans up the scheme when it matches the base, so these are spelled out.
+    assert _resolve(href, _split_base("http://a/b/c")) == expected
@@ -0,0 +1,125 @@
+import asyncio
+import sqlite3
+
+import aiohttp
+
+from pdf_crawler.config import CrawlConfig
+from pdf_crawler.crawler import CrawlSession, PageTask
+from pdf_crawler.frontier import DONE, IN_FLIGHT, PENDING, Frontier
+
+
+def _statuses(path):
+    with sqlite3.connect(path) as conn:
+        return dict(conn.execute("SELECT url, status FROM frontier"))
+
+
+def test_pushes_are_written_before_each_read(tmp_path):
+    frontier = Frontier(tmp_path / "frontier.db")
+    for index in range(3):
+        frontier.push(f"https://example.com/{index}", 1)
+    assert _statuses(tmp_path / "frontier.db") == {}
+    assert frontier.pop_batch(10) == [(f"https://example.com/{index}", 1) for index in range(3)]
+    assert frontier.pop_batch(10) == []
+    frontier.close()
+
+
+def test_duplicate_pushes_are_ignored(tmp_path):
+    frontier = Frontier(tmp_path / "frontier.db")
+    frontier.push("https://example.com/a", 1)
+    frontier.push("https://example.com/a", 2)
+    assert frontier.pop_batch(10) == [("https://example.com/a", 1)]
+    frontier.push("https://example.com/a", 3)
+    assert frontier.pop_batch(10) == []
+    frontier.close()
+
+
+def test_completions_are_written_with_pushes(tmp_path):
+    path = tmp_path / "frontier.db"
+    frontier = Frontier(path, batch_size=4)
+    frontier.push("https://example.com/a", 0)
+    frontier.push("https://example.com/b", 0)
+    frontier.pop_batch(4)
+    frontier.complete("https://example.com/a")
+    frontier.push("https://example.com/c", 1)
+    assert frontier.pop_batch(4) == [("https://example.com/c", 1)]
+    # pop_batch writes the new push but leaves the completion buffered.
+    assert _statuses(path)["https://example.com/a"] == IN_FLIGHT
+    frontier.complete("https://example.com/b")
+    for name in "def":
+        frontier.push(f"https://example.com/{name}", 1)
+    assert _statuses(path)["https://example.com/b"] == IN_FLIGHT
+    # A full push buffer flushes the buffered completions in the same transaction.
+    frontier.push("https://example.com/g", 1)
+    statuses = _statuses(path)
+    assert statuses["https://example.com/a"] == statuses["https://example.com/b"] == DONE
+    assert [statuses[f"https://example.com/{name}"] for name in "defg"] == [PENDING] * 4
+    frontier.close()
+
+
+def test_resume_returns_in_flight_rows_to_pending(tmp_path):
+    path = tmp_path / "frontier.db"
+    frontier = Frontier(path)
+    for name in "abc":
+        frontier.push(f"https://example.com/{name}", 1)
+    frontier.pop_batch(2)
+    frontier.complete("https://example.com/a")
+    frontier.close()
+    assert _statuses(path) == {
+        "https://example.com/a": DONE,
+        "https://example.com/b": IN_FLIGHT,
+        "https://example.com/c": PENDING,
+    }
+
+    resumed = Frontier(path, resume=True)
+    assert resumed.pop_batch(10) == [("https://example.com/b", 1), ("https://example.com/c", 1)]
+    resumed.close()
+
+    fresh = Frontier(path)
+    assert fresh.pop_batch(10) == []
+    fresh.close()
+
+
+def test_run_refills_at_half_a_batch(tmp_path):
+    batch_size = 8
+    limits = []
+
+    async def crawl():
+        config = CrawlConfig(url="https://example.com/", output_dir=tmp_path, respect_robots_txt=False)
+        async with aiohttp.ClientSession() as http:
+            session = CrawlSession(config, http, static_fetcher=None, playwright_fetcher=None)
+            session.frontier.close()
+            session.frontier = Frontier(tmp_path / "frontier.db", batch_size=batch_size)
+            pop_batch = session.frontier.pop_batch
+
+            def recording_pop_batch(limit):
+                limits.append(limit)
+                return pop_batch(limit)
+
+            async def process(task: PageTask) -> None:
+                if task.depth == 0:
+                    for index in range(40):
+                        session.frontier.push(f"https://example.com/{index}", 1)
+                await asyncio.sleep(0.001 * (hash(task.url) % 5))
+
+            session.frontier.pop_batch = recording_pop_batch
+            session._process = process
+            await session.run()
+
+    asyncio.run(crawl())
+    # After the seed, each refill waits until no more than half the batch is outstanding.
+    assert all(limit >= batch_size - batch_size // 2 for limit in limits[1:])
+    assert len(limits) < 41
+    statuses = _statuses(tmp_path / "frontier.db")
+    assert len(statuses) == 41 and set(statuses.values()) == {DONE}
+
+
+def test_batch_covers_concurrency(tmp_path):
+    async def build():
+        config = CrawlConfig(url="https://example.com/", output_dir=tmp_path, concurrency=1000)
+        async with aiohttp.ClientSession() as http:
+            session = CrawlSession(config, http, static_fetcher=None, playwright_fetcher=None)
+            session.parse_executor.shutdown()
+            session.frontier.close()
+            return session.frontier.batch_size
+
+    assert asyncio.run(build()) >= 2000
@@ -0,0 +1,65 @@
+import asyncio
+import io
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from pypdf import PdfWriter
+
+from pdf_crawler.storage import PDFStorage
+
+
+def _pdf_bytes(title=None):
+    writer = PdfWriter()
+    writer.add_blank_page(width=72, height=72)
+    if title:
+        writer.add_metadata({"/Title": title})
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def _save_all(base_dir, files, urls):
+    """Serve ``files`` by path and save each of ``urls`` through a fresh PDFStorage, in order."""
+
+    async def handler(request):
+        return web.Response(body=files[request.path], content_type="application/pdf")
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/{name:.*}", handler)
+        async with TestServer(app) as server, aiohttp.ClientSession() as http:
+            storage = PDFStorage(base_dir, http)
+            saved = []
+            for path in urls:
+                url = str(server.make_url(path))
+                saved.append(await storage.build_document(url=url, source_page="https://example.com/", context=None))
+            return storage, saved
+
+    return asyncio.run(run())
+
+
+def test_named_by_title(tmp_path):
+    _, [document] = _save_all(tmp_path, {"/a.pdf": _pdf_bytes("Annual Report")}, ["/a.pdf"])
+    assert document.filename.name == "Annual_Report.pdf"
+    assert document.title == "Annual_Report"
+    assert not list(tmp_path.rglob("*.part"))
+
+
+def test_duplicate_content_returns_existing_path(tmp_path):
+    body = _pdf_bytes()
+    storage, [first, second] = _save_all(tmp_path, {"/a.pdf": body, "/mirror/b.pdf": body}, ["/a.pdf", "/mirror/b.pdf"])
+    assert second.filename == first.filename
+    assert [path.name for path in first.filename.parent.iterdir()] == ["a.pdf"]
+    # The name reserved for the duplicate is released again.
+    assert storage._domain_names[first.filename.parent] == {"a"}
+
+
+def test_duplicate_of_earlier_run_is_not_saved_again(tmp_path):
+    body = _pdf_bytes("Annual Report")
+    files = {"/a.pdf": body, "/other.pdf": _pdf_bytes("Other"), "/mirror/a.pdf": body}
+    _, [original] = _save_all(tmp_path, files, ["/a.pdf"])
+    _, [other, mirror] = _save_all(tmp_path, files, ["/other.pdf", "/mirror/a.pdf"])
+    assert mirror.filename == original.filename
+    assert mirror.title == "Annual_Report"
+    assert sorted(path.name for path in original.filename.parent.iterdir()) == ["Annual_Report.pdf", "Other.pdf"]
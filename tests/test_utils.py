@@ -0,0 +1,119 @@
+from pathlib import Path
+
+import pytest
+from pypdf import PdfReader, PdfWriter
+
+from pdf_crawler.utils import _PDFDOC_UNDEFINED, _read_info_title, extract_pdf_title, slugify
+
+TITLES = [
+    "Annual report 2023",
+    "Budget (draft) \\ final",
+    "Šibenik report",
+    "Œuvres complètes",
+    "Žilina – annual ﬁnance",
+    "Café “quoted” …",
+    "Отчёт за год",
+    "年度报告",
+]
+
+
+def _write_pdf(path: Path, title: str) -> Path:
+    writer = PdfWriter()
+    writer.add_blank_page(width=72, height=72)
+    writer.add_metadata({"/Title": title})
+    writer.write(path)
+    return path
+
+
+def _classic_pdf(info: bytes) -> bytes:
+    """Return a minimal PDF with a classic xref table and the given Info dictionary body."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", b"<< /Type /Pages /Kids [] /Count 0 >>", info]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R /Info 3 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def _append_update(data: bytes, info: bytes) -> bytes:
+    """Append an incremental update that replaces object 3 (the Info dictionary)."""
+    prev = int(data.rsplit(b"startxref", 1)[1].split()[0])
+    out = bytearray(data)
+    offset = len(out)
+    out += b"3 0 obj\n%s\nendobj\n" % info
+    xref = len(out)
+    out += b"xref\n3 1\n%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size 4 /Root 1 0 R /Info 3 0 R /Prev %d >>\nstartxref\n%d\n%%%%EOF\n" % (prev, xref)
+    return bytes(out)
+
+
+def _expected(path: Path):
+    title = PdfReader(path, strict=False).metadata.title
+    return slugify(title, allow_unicode=True) if title else None
+
+
+def test_every_pdfdoc_byte_matches_pypdf(tmp_path):
+    defined = [byte for byte in range(1, 256) if byte not in _PDFDOC_UNDEFINED]
+    path = tmp_path / "pdfdoc.pdf"
+    path.write_bytes(_classic_pdf(b"<< /Title (" + b"".join(b"\\%03o" % byte for byte in defined) + b") >>"))
+    assert _read_info_title(path) == PdfReader(path).metadata.title
+
+
+@pytest.mark.parametrize("byte", sorted(_PDFDOC_UNDEFINED))
+def test_undefined_pdfdoc_byte_falls_back_to_pypdf(tmp_path, byte):
+    path = tmp_path / "undefined.pdf"
+    path.write_bytes(_classic_pdf(b"<< /Title (Report \\%03o 2023) >>" % byte))
+    with pytest.raises(ValueError):
+        _read_info_title(path)
+    assert extract_pdf_title(path) == _expected(path)
+
+
+@pytest.mark.parametrize("title", TITLES)
+def test_title_matches_pypdf(tmp_path, title):
+    path = _write_pdf(tmp_path / "doc.pdf", title)
+    assert _read_info_title(path) == PdfReader(path).metadata.title == title
+    assert extract_pdf_title(path) == _expected(path)
+
+
+@pytest.mark.parametrize(
+    "raw, title",
+    [
+        (b"(\x97ibenik report)", "Šibenik report"),
+        (b"(\x96uvres compl\xe8tes)", "Œuvres complètes"),
+        (b"(\x99ilina \x85 annual \x93nance)", "Žilina – annual ﬁnance"),
+        (b"<FEFF0160006900620065006E0069006B>", "Šibenik"),
+        (b"(Line\\nbreak \\(nested\\) \\101)", "Line\nbreak (nested) A"),
+    ],
+)
+def test_raw_string_titles(tmp_path, raw, title):
+    path = tmp_path / "raw.pdf"
+    path.write_bytes(_classic_pdf(b"<< /Title " + raw + b" >>"))
+    assert _read_info_title(path) == PdfReader(path).metadata.title == title
+
+
+def test_incremental_update_uses_latest_info(tmp_path):
+    path = tmp_path / "incremental.pdf"
+    original = _classic_pdf(b"<< /Title (Draft) >>")
+    path.write_bytes(_append_update(original, b"<< /Title (\x97ibenik final) >>"))
+    assert _read_info_title(path) == PdfReader(path).metadata.title == "Šibenik final"
+    assert extract_pdf_title(path) == _expected(path)
+
+
+def test_pypdf_incremental_update(tmp_path):
+    path = _write_pdf(tmp_path / "doc.pdf", "Draft")
+    writer = PdfWriter(path, incremental=True)
+    writer.add_metadata({"/Title": "Œuvres complètes"})
+    writer.write(path)
+    assert extract_pdf_title(path) == _expected(path) == "Œuvres_complètes"
+
+
+def test_missing_title(tmp_path):
+    path = tmp_path / "untitled.pdf"
+    path.write_bytes(_classic_pdf(b"<< /Producer (test) >>"))
+    assert _read_info_title(path) is None
+    assert extract_pdf_title(path) is None